@@ -1,8 +1,15 @@
+import io
 import os
 import boto3
+import pandas as pd
+import psycopg2
+import pyarrow as pa
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 load_dotenv()
@@ -13,6 +20,16 @@ ACCESS_KEY_ID = os.getenv("ACCESS_KEY_ID")
 AWS_REGION = "eu-north-1"   # Stockholm Region
 LOCAL_TMP = "./tmp"
 
+# SHARED CLIENT
+# built once so credential resolution and the connection pool are reused
+# across every bucket check and upload; pool sized above max_workers *
+# per-file multipart concurrency so parallel uploads never starve
+_BOTO_SESSION = boto3.Session(region_name=AWS_REGION,
+                              aws_access_key_id=ACCESS_KEY_ID,
+                              aws_secret_access_key=SECRET_ACCESS_KEY)
+_S3 = _BOTO_SESSION.client("s3", config=Config(max_pool_connections=64,
+                                               retries={"max_attempts": 10, "mode": "adaptive"}))
+
 def init_supabase():
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_KEY")
@@ -23,9 +40,34 @@ def init_supabase():
     return create_client(url, key)
 
 
+def copy_dataframe_to_postgres(df, table_name, dsn):
+    """
+    Bulk load a dataframe through Postgres COPY: one round-trip streaming CSV
+    instead of hundreds of JSON insert requests.
+    """
+    buf = io.StringIO()
+    df.to_csv(buf, index=False)
+    buf.seek(0)
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            # name the target columns: HEADER TRUE only skips the header line,
+            # it does not match columns by name, so order must be pinned
+            columns = ", ".join(f'"{c}"' for c in df.columns)
+            cur.copy_expert(f'COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE)', buf)
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"COPY loaded {len(df)} rows into '{table_name}'.")
+
+
 def dataframe_to_supabase(df, table_name, supabase: Client, chunk_size=500):
     """
-    Insert a dataframe into a Supabase table in chunks.
+    Insert a dataframe into a Supabase table.
+    Uses Postgres COPY when SUPABASE_DB_URL is set (much faster for table-sized
+    loads), otherwise falls back to chunked REST inserts.
     Converts datetime columns to ISO format automatically.
     """
 
@@ -33,19 +75,44 @@ def dataframe_to_supabase(df, table_name, supabase: Client, chunk_size=500):
         print(f"Skipped: DataFrame for '{table_name}' is empty.")
         return
 
-    # Convert all datetime columns to ISO strings
-    for col in df.columns:
-        if str(df[col].dtype).startswith("datetime"):
-            df[col] = df[col].astype(str)
+    # Convert all datetime columns to ISO strings in one vectorized pass.
+    # select_dtypes misses Arrow-backed timestamp columns (the polars path
+    # returns those), so check dtypes directly
+    def _is_datetime(series):
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return True
+        dtype = series.dtype
+        return isinstance(dtype, pd.ArrowDtype) and pa.types.is_timestamp(dtype.pyarrow_dtype)
+
+    # %z raises on tz-naive Arrow timestamps and renders empty on naive numpy
+    # ones, so the offset is only appended when the column carries a timezone
+    def _to_iso(series):
+        dtype = series.dtype
+        tz = getattr(dtype, "tz", None)
+        if tz is None and isinstance(dtype, pd.ArrowDtype):
+            tz = dtype.pyarrow_dtype.tz
+        fmt = "%Y-%m-%dT%H:%M:%S%z" if tz is not None else "%Y-%m-%dT%H:%M:%S"
+        return series.dt.strftime(fmt).astype("string")
+
+    dt_cols = [c for c in df.columns if _is_datetime(df[c])]
+    if len(dt_cols):
+        df[dt_cols] = df[dt_cols].apply(_to_iso)
+
+    # Prefer the direct Postgres connection Supabase exposes
+    dsn = os.getenv("SUPABASE_DB_URL")
+    if dsn:
+        copy_dataframe_to_postgres(df, table_name, dsn)
+        return
 
-    # Convert df to list of dicts
-    records = df.to_dict(orient="records")
+    # Slice through Arrow so only chunk_size row dicts are alive at a time,
+    # instead of materializing the whole frame as a list of dicts up front
+    table = pa.Table.from_pandas(df, preserve_index=False)
 
-    print(f"Uploading {len(records)} rows to table '{table_name}'...")
+    print(f"Uploading {table.num_rows} rows to table '{table_name}'...")
 
     # Insert in chunks (Supabase recommends batching)
-    for i in range(0, len(records), chunk_size):
-        batch = records[i:i+chunk_size]
+    for i in range(0, table.num_rows, chunk_size):
+        batch = table.slice(i, chunk_size).to_pylist()
 
         response = supabase.table(table_name).insert(batch).execute()
 
@@ -57,13 +124,9 @@ def dataframe_to_supabase(df, table_name, supabase: Client, chunk_size=500):
     print(f"Done inserting into '{table_name}'.")
 
 def ensure_bucket_exists(bucket_name, region=AWS_REGION):
-    s3 = boto3.client("s3", region_name=AWS_REGION,\
-        aws_access_key_id=ACCESS_KEY_ID,\
-        aws_secret_access_key=SECRET_ACCESS_KEY)
-
     # Check if bucket exists
     try:
-        s3.head_bucket(Bucket=bucket_name)
+        _S3.head_bucket(Bucket=bucket_name)
         print(f"Bucket '{bucket_name}' already exists.")
         return
     except ClientError as e:
@@ -74,9 +137,9 @@ def ensure_bucket_exists(bucket_name, region=AWS_REGION):
     # If not exists → create it
     print(f"Creating bucket '{bucket_name}'...")
     if region == "us-east-1":
-        s3.create_bucket(Bucket=bucket_name)
+        _S3.create_bucket(Bucket=bucket_name)
     else:
-        s3.create_bucket(
+        _S3.create_bucket(
             Bucket=bucket_name,
             CreateBucketConfiguration={"LocationConstraint": region}
         )
@@ -84,33 +147,39 @@ def ensure_bucket_exists(bucket_name, region=AWS_REGION):
 
 
 def upload_parquet_files(local_dir, bucket_name, s3_prefix=""):
-    s3 = boto3.client("s3", region_name=AWS_REGION,\
-        aws_access_key_id=ACCESS_KEY_ID,\
-        aws_secret_access_key=SECRET_ACCESS_KEY)
-
     # Ensure the bucket exists
     ensure_bucket_exists(bucket_name)
 
-    # Loop through local parquet files
-    for file_name in os.listdir(local_dir):
-        if file_name.endswith(".parquet"):
-            local_path = os.path.join(local_dir, file_name)
-            s3_path = f"{s3_prefix}/{file_name}" if s3_prefix else file_name
+    # 64MB multipart parts instead of boto3's 8MB default
+    transfer_config = TransferConfig(multipart_chunksize=64 * 1024 * 1024, max_concurrency=8, use_threads=True)
+
+    def upload_one(entry):
+        s3_path = f"{s3_prefix}/{entry.name}" if s3_prefix else entry.name
+
+        try:
+            print(f"Uploading {entry.path} -> s3://{bucket_name}/{s3_path}")
+            _S3.upload_file(entry.path, bucket_name, s3_path, Config=transfer_config)
+        except Exception as e:
+            print(f"ERROR uploading {entry.name}: {e}")
 
-            try:
-                print(f"Uploading {local_path} -> s3://{bucket_name}/{s3_path}")
-                s3.upload_file(local_path, bucket_name, s3_path)
-            except Exception as e:
-                print(f"ERROR uploading {file_name}: {e}")
+    # Upload the local parquet files concurrently
+    # scandir caches is_file/stat per dirent, so the walk is one syscall per entry
+    with os.scandir(local_dir) as it:
+        parquet_files = [
+            entry for entry in it
+            if entry.is_file(follow_symlinks=False) and entry.name.endswith(".parquet")
+        ]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(upload_one, parquet_files))
 
     print("Upload complete")
 
 
 def remove_files(tmp_dir = LOCAL_TMP):
-    for entry in os.listdir(tmp_dir):
-        full_path = os.path.join(tmp_dir, entry)
-        if os.path.isfile(full_path):
-            os.remove(full_path)
-        # to delete folders too:
-        # elif os.path.isdir(full_path):
-        #     shutil.rmtree(full_path)
+    with os.scandir(tmp_dir) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                os.remove(entry.path)
+            # to delete folders too:
+            # elif entry.is_dir(follow_symlinks=False):
+            #     shutil.rmtree(entry.path)
@@ -1,11 +1,14 @@
 import psycopg2
 import os
 import logging
+import threading
+from psycopg2.pool import ThreadedConnectionPool
 from typing import Dict, List
 
 import boto3
 import pandas as pd
 from dotenv import load_dotenv
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 load_dotenv()
@@ -16,6 +19,16 @@ ACCESS_KEY_ID = os.getenv("ACCESS_KEY_ID")
 AWS_REGION = "eu-north-1"   # Stockholm Region
 LOCAL_TMP = "./tmp"
 
+# SHARED CLIENTS
+# one session and one connection pool for the whole module: credentials are
+# resolved once and HTTP keep-alive is reused across every S3/SSM call
+_BOTO_SESSION = boto3.Session(region_name=AWS_REGION,
+                              aws_access_key_id=ACCESS_KEY_ID,
+                              aws_secret_access_key=SECRET_ACCESS_KEY)
+_S3 = _BOTO_SESSION.client("s3", config=Config(max_pool_connections=64,
+                                               retries={"max_attempts": 10, "mode": "adaptive"}))
+_SSM = _BOTO_SESSION.client("ssm", config=Config(retries={"max_attempts": 10, "mode": "adaptive"}))
+
 # S3 PATHS
 CUSTOMERS_S3_PATH = "s3://core-telecoms-data-lake/customers/"
 CALL_LOGS_PREFIX = "s3://core-telecoms-data-lake/call logs/"  # contains daily CSV
@@ -48,24 +61,17 @@ def ensure_tmp_folder():
 
 def download_s3_file(s3_path, local_path):
     """Downloads a single object from S3."""
-    s3 = boto3.client("s3", region_name=AWS_REGION,\
-                    aws_access_key_id=ACCESS_KEY_ID,\
-                    aws_secret_access_key=SECRET_ACCESS_KEY)
-
     bucket, key = s3_path.replace("s3://", "").split("/", 1)
-    s3.download_file(bucket, key, local_path)
+    _S3.download_file(bucket, key, local_path)
 
     logging.info(f"Downloaded S3 file → {local_path}")
 
 
 def download_s3_prefix(prefix, local_dir, file_type="csv"):
     """Downloads all objects under a folder/prefix."""
-    s3 = boto3.client("s3", region_name=AWS_REGION,\
-                    aws_access_key_id=ACCESS_KEY_ID,\
-                    aws_secret_access_key=SECRET_ACCESS_KEY)
     bucket, key_prefix = prefix.replace("s3://", "").split("/", 1)
 
-    response = s3.list_objects_v2(Bucket=bucket, Prefix=key_prefix)
+    response = _S3.list_objects_v2(Bucket=bucket, Prefix=key_prefix)
 
     if "Contents" not in response:
         logging.warning(f"No files found under prefix {prefix}")
@@ -80,7 +86,7 @@ def download_s3_prefix(prefix, local_dir, file_type="csv"):
 
         filename = key.split("/")[-1]
         local_path = os.path.join(local_dir, filename)
-        s3.download_file(bucket, key, local_path)
+        _S3.download_file(bucket, key, local_path)
         downloaded_files.append(local_path)
 
         logging.info(f"Downloaded {file_type.upper()} from → {local_path}")
@@ -90,12 +96,8 @@ def download_s3_prefix(prefix, local_dir, file_type="csv"):
 
 def get_ssm_parameter(name: str, decrypt: bool = True, region: str = "eu-north-1"):
     
-    ssm = boto3.client("ssm", region_name=AWS_REGION,\
-                        aws_access_key_id=ACCESS_KEY_ID,\
-                    aws_secret_access_key=SECRET_ACCESS_KEY)
-
     try:
-        response = ssm.get_parameter(
+        response = _SSM.get_parameter(
             Name=name,
             WithDecryption=decrypt
         )
@@ -105,20 +107,68 @@ def get_ssm_parameter(name: str, decrypt: bool = True, region: str = "eu-north-1
         raise Exception(f"SSM error retrieving '{name}': {e}")
 
 
+def get_db_credentials(path: str = POSTGRES_SSM_PARAMETER, decrypt: bool = True) -> Dict:
+    """Fetches every database parameter under an SSM path in one API call."""
+
+    # SSM parameter name -> psycopg2 connection kwarg
+    key_map = {
+        "db_host": "host",
+        "db_name": "database",
+        "db_username": "user",
+        "db_password": "password",
+        "db_port": "port",
+    }
+
+    credentials = {}
+    try:
+        # paginate: get_parameters_by_path returns at most 10 results per page
+        paginator = _SSM.get_paginator("get_parameters_by_path")
+        for page in paginator.paginate(Path=path, WithDecryption=decrypt):
+            for parameter in page["Parameters"]:
+                name = parameter["Name"].rsplit("/", 1)[1]
+                if name in key_map:
+                    credentials[key_map[name]] = parameter["Value"]
+    except ClientError as e:
+        raise Exception(f"SSM error retrieving parameters under '{path}': {e}")
+
+    return credentials
+
+
 # POSTGRES EXTRACTION
+_PG_POOL = None
+_PG_POOL_LOCK = threading.Lock()
+
+
+def _get_pg_pool(credentials):
+    """Lazily builds one shared connection pool instead of connecting per table.
+
+    The lock matters: the first callers are concurrent extraction threads, and
+    an unguarded check-then-set would let several of them build pools, leaking
+    the losers' connections.
+    """
+    global _PG_POOL
+    with _PG_POOL_LOCK:
+        if _PG_POOL is None:
+            _PG_POOL = ThreadedConnectionPool(
+                1, 8,
+                host=credentials["host"],
+                user=credentials["user"],
+                password=credentials["password"],
+                database=credentials["database"],
+                port=credentials["port"]
+            )
+    return _PG_POOL
+
+
 def extract_postgres_table(table_name, credentials):
     """Extracts a single Postgres table into a pandas DataFrame."""
-    conn = psycopg2.connect(
-        host=credentials["host"],
-        user=credentials["user"],
-        password=credentials["password"],
-        database=credentials["database"],
-        port=credentials["port"]
-    )
-
-    query = f"SELECT * FROM customer_complaints.{table_name} LIMIT 5;"
-    df = pd.read_sql(query, conn)
-    conn.close()
+    pool = _get_pg_pool(credentials)
+    conn = pool.getconn()
+    try:
+        query = f"SELECT * FROM customer_complaints.{table_name} LIMIT 5;"
+        df = pd.read_sql(query, conn)
+    finally:
+        pool.putconn(conn)
 
     logging.info(f"Extracted Postgres table → {table_name}")
     return df
@@ -137,12 +187,8 @@ def download_customer_csvs(
     # Ensure local folder exists
     os.makedirs(local_dir, exist_ok=True)
 
-    s3 = boto3.client("s3", region_name=AWS_REGION,\
-                        aws_access_key_id=ACCESS_KEY_ID,\
-                    aws_secret_access_key=SECRET_ACCESS_KEY)
-
     # List *only* objects under the prefix
-    response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
+    response = _S3.list_objects_v2(Bucket=bucket, Prefix=prefix)
 
     if "Contents" not in response:
         print("No files found under the prefix.")
@@ -157,6 +203,6 @@ def download_customer_csvs(
             local_path = os.path.join(local_dir, filename)
 
             print(f"Downloading {key} → {local_path}")
-            s3.download_file(bucket, key, local_path)
+            _S3.download_file(bucket, key, local_path)
 
     print("All CSV files downloaded successfully!")
@@ -20,34 +20,43 @@ Requirements (pip):
   boto3
   pandas
   pyarrow
-  s3fs
   tenacity
   google-api-python-client
   google-auth
   psycopg2-binary
+  connectorx
 
 """
 
 import os
 import re
-import io
 import json
 import hashlib
 import logging
-import tempfile
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 
 import boto3
+from botocore.config import Config
 import pandas as pd
 import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as pads
+import pyarrow.fs as pafs
+import pyarrow.json as pajson
 import pyarrow.parquet as pq
-import s3fs
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
 import psycopg2
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 
+try:
+    # streams the Postgres binary wire format straight into Arrow buffers
+    import connectorx as cx
+except ImportError:
+    cx = None
+
 
 # Configuration (env)
 
@@ -66,21 +75,24 @@ GOOGLE_SHEET_RANGE = os.environ.get("GOOGLE_SHEET_RANGE", "Agents!A1:Z999")
 POSTGRES_SSM_PARAM = os.environ.get("POSTGRES_SSM_PARAM", "/customer_complaints/db_credentials")
 POSTGRES_SCHEMA = os.environ.get("POSTGRES_SCHEMA", "customer_complaints")
 
-# Metadata / idempotency
+# Metadata / idempotency: append-only parquet dataset, one row per processed source
 METADATA_PREFIX = os.environ.get("METADATA_PREFIX", f"{S3_RAW_PREFIX}/_metadata")
-PROCESSED_MANIFEST = METADATA_PREFIX + "/processed_files.json"
+PROCESSED_MANIFEST = f"{S3_RAW_BUCKET}/{METADATA_PREFIX}/processed"
 
 # Logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger(__name__)
 
 # Clients
+# pool sized above the ingest worker count so concurrent uploads never starve
 boto3_session = boto3.Session(region_name=AWS_REGION)
-s3_client = boto3_session.client("s3")
+s3_client = boto3_session.client("s3", config=Config(max_pool_connections=32))
 ssm_client = boto3_session.client("ssm")
 s3_resource = boto3_session.resource("s3")
 
-s3_fs = s3fs.S3FileSystem(region_name=AWS_REGION)
+# Arrow's S3 filesystem does its I/O in C++ threads that release the GIL,
+# unlike s3fs/boto3 read paths which hold it.
+arrow_fs = pafs.S3FileSystem(region=AWS_REGION)
 
 
 # Utilities
@@ -89,66 +101,120 @@ def ensure_local_tmp():
     os.makedirs(LOCAL_TMP, exist_ok=True)
 
 
+# compiled once at import; re.sub with a string pattern recompiles per call
+_RE_SEPARATORS = re.compile(r"[\s/\\.-]+")
+_RE_NON_ALNUM = re.compile(r"[^0-9a-zA-Z_]+")
+_RE_MULTI_UNDERSCORE = re.compile(r"_+")
+
+
 def normalize_column_name(col: str) -> str:
     # lower case, replace spaces and special chars with underscore
     col = col.strip()
     col = col.replace("\n", " ")
-    col = re.sub(r"[\s/\\.-]+", "_", col)
-    col = re.sub(r"[^0-9a-zA-Z_]+", "", col)
+    col = _RE_SEPARATORS.sub("_", col)
+    col = _RE_NON_ALNUM.sub("", col)
     col = col.lower()
     # collapse multiple underscores
-    col = re.sub(r"_+", "_", col)
+    col = _RE_MULTI_UNDERSCORE.sub("_", col)
     return col
 
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    mapping = {c: normalize_column_name(c) for c in df.columns}
-    df.rename(columns=mapping, inplace=True)
+    # replacing the Index mutates no data, so no defensive copy of the frame —
+    # callers pass frames they just produced anyway
+    df.columns = [normalize_column_name(c) for c in df.columns]
     return df
 
 
+def normalize_table_columns(table: pa.Table) -> pa.Table:
+    """Arrow version of normalize_columns: renames only the schema, zero data copy."""
+    return table.rename_columns([normalize_column_name(c) for c in table.column_names])
+
+
 EMAIL_REGEX = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
 
 
-def clean_email(email: str) -> str:
-    if not isinstance(email, str):
-        return None
-    email = email.strip().lower()
+def clean_email_series(emails: pd.Series) -> pd.Series:
+    """Vectorized email cleaning; invalid emails become None."""
+    s = emails.astype("string").str.strip().str.lower()
     # simple correction heuristics
-    email = email.replace("(at)", "@").replace("[at]", "@").replace(" at ", "@")
-    email = email.replace("\s+", "")
-    if EMAIL_REGEX.match(email):
-        return email
-    return None
+    s = s.str.replace("(at)", "@", regex=False)
+    s = s.str.replace("[at]", "@", regex=False)
+    s = s.str.replace(" at ", "@", regex=False)
+    s = s.str.replace(r"\s+", "", regex=True)
+    mask = s.str.match(EMAIL_REGEX.pattern)
+    return s.where(mask.fillna(False), None)
+
+
+def clean_email_table(table: pa.Table) -> pa.Table:
+    """Apply the email cleaning heuristics to an Arrow table.
+
+    Only the email column round-trips through pandas; everything else stays
+    in Arrow buffers.
+    """
+    if 'email' not in table.column_names:
+        return table
+    raw = table.column('email')
+    cleaned = pa.Array.from_pandas(clean_email_series(raw.to_pandas()))
+    idx = table.column_names.index('email')
+    table = table.set_column(idx, 'email', cleaned)
+    return table.append_column('email_raw', raw)
+
+
+def _hash_schema_items(pairs) -> str:
+    # feed the hasher incrementally instead of building a joined string first
+    h = hashlib.md5()
+    for name, dtype in pairs:
+        h.update(name.encode())
+        h.update(b':')
+        h.update(str(dtype).encode())
+        h.update(b'|')
+    return h.hexdigest()
 
 
 def hash_df_schema(df: pd.DataFrame) -> str:
     # simple schema hash based on column names and dtypes
-    items = [f"{c}:{str(dtype)}" for c, dtype in zip(df.columns, df.dtypes)]
-    joined = "|".join(items)
-    return hashlib.md5(joined.encode()).hexdigest()
+    return _hash_schema_items(zip(df.columns, df.dtypes))
+
+
+def hash_table_schema(table: pa.Table) -> str:
+    # same idea as hash_df_schema but on an Arrow schema
+    return _hash_schema_items((f.name, f.type) for f in table.schema)
 
 
 # Metadata store helpers
 
-def read_processed_manifest() -> Dict[str, Dict]:
-    """Reads the JSON manifest of processed files from S3. Returns {source_path: metadata} """
+def read_processed_paths(candidate_paths: List[str] = None) -> set:
+    """Returns the set of already-processed source paths from the parquet manifest.
+
+    Passing candidate_paths pushes an isin predicate into the parquet scan, so
+    the membership check stays cheap no matter how large the manifest grows.
+    """
     try:
-        if not s3_fs.exists(PROCESSED_MANIFEST):
-            return {}
-        with s3_fs.open(PROCESSED_MANIFEST, "r") as f:
-            return json.load(f)
+        if arrow_fs.get_file_info(PROCESSED_MANIFEST).type == pafs.FileType.NotFound:
+            return set()
+        dataset = pads.dataset(PROCESSED_MANIFEST, format='parquet', filesystem=arrow_fs, partitioning='hive')
+        row_filter = None
+        if candidate_paths is not None:
+            row_filter = pads.field('source_path').isin(candidate_paths)
+        table = dataset.to_table(columns=['source_path'], filter=row_filter)
+        return set(table.column('source_path').to_pylist())
     except Exception as e:
         logger.exception("Failed to read processed manifest: %s", e)
-        return {}
+        return set()
 
 
-def write_processed_manifest(manifest: Dict[str, Dict]):
+def append_processed_manifest(rows: List[Dict]):
+    """Appends one small parquet per batch; concurrent runs never rewrite each other."""
+    if not rows:
+        return
     try:
-        with s3_fs.open(PROCESSED_MANIFEST, "w") as f:
-            json.dump(manifest, f)
-        logger.info("Wrote processed manifest to %s", PROCESSED_MANIFEST)
+        now = datetime.datetime.utcnow()
+        part_path = (f"{PROCESSED_MANIFEST}/date={now.strftime('%Y-%m-%d')}/"
+                     f"part-{now.strftime('%Y%m%d%H%M%S')}-{os.getpid()}.parquet")
+        with arrow_fs.open_output_stream(part_path) as f:
+            pq.write_table(pa.Table.from_pylist(rows), f)
+        logger.info("Appended %d rows to processed manifest at %s", len(rows), part_path)
     except Exception:
         logger.exception("Failed to write processed manifest")
 
@@ -172,27 +238,34 @@ def list_s3_objects(prefix_s3: str) -> List[Dict]:
 
 
 @retry(wait=wait_exponential(min=1, max=30), stop=stop_after_attempt(5), retry=retry_if_exception_type(Exception))
-def download_s3_to_dataframe(s3_path: str) -> pd.DataFrame:
-    """Read CSV or JSON from S3 into a pandas DataFrame. Auto-detect by extension."""
+def download_s3_to_table(s3_path: str) -> pa.Table:
+    """Read CSV or JSON from S3 into an Arrow Table. Auto-detect by extension.
+
+    Arrow's multithreaded C++ readers parse straight into columnar buffers,
+    skipping the pandas roundtrip that would otherwise happen again at
+    parquet-write time.
+    """
     logger.info("Reading %s", s3_path)
     if not s3_path.startswith('s3://'):
         raise ValueError("s3_path must start with s3://")
     bucket_key = s3_path.replace('s3://', '')
-    bucket, key = bucket_key.split('/', 1)
-    ext = key.split('.')[-1].lower()
-    obj = s3_client.get_object(Bucket=bucket, Key=key)
-    body = obj['Body'].read()
+    ext = bucket_key.split('.')[-1].lower()
     if ext in ['csv', 'txt']:
-        df = pd.read_csv(io.BytesIO(body))
+        with arrow_fs.open_input_stream(bucket_key) as f:
+            table = pacsv.read_csv(
+                f,
+                read_options=pacsv.ReadOptions(use_threads=True, block_size=8 << 20)
+            )
     elif ext in ['json']:
-        # support newline-delimited json or a json array
-        try:
-            df = pd.read_json(io.BytesIO(body), lines=True)
-        except ValueError:
-            df = pd.read_json(io.BytesIO(body), lines=False)
+        # handles both newline-delimited json and json arrays
+        with arrow_fs.open_input_stream(bucket_key) as f:
+            table = pajson.read_json(
+                f,
+                read_options=pajson.ReadOptions(use_threads=True, block_size=8 << 20)
+            )
     else:
         raise ValueError(f"Unsupported extension: {ext}")
-    return df
+    return table
 
 
 # Postgres extraction
@@ -208,20 +281,33 @@ def get_ssm_param_json(name: str) -> Dict:
 
 
 @retry(wait=wait_exponential(min=1, max=30), stop=stop_after_attempt(5), retry=retry_if_exception_type(Exception))
-def extract_postgres_table_to_df(table_name: str, credentials: Dict, schema: str = POSTGRES_SCHEMA, chunksize: int = 10000) -> pd.DataFrame:
+def extract_postgres_table_to_arrow(table_name: str, credentials: Dict, schema: str = POSTGRES_SCHEMA, chunksize: int = 10000) -> pa.Table:
     logger.info("Extracting Postgres table %s", table_name)
+    sql = f"SELECT * FROM {schema}.{table_name}"
+    if cx is not None:
+        uri = (f"postgresql://{credentials['username']}:{credentials['password']}"
+               f"@{credentials['host']}:{credentials.get('port', 5432)}/{credentials['dbname']}")
+        return cx.read_sql(uri, sql, return_type="arrow")
+
+    # fallback when connectorx is not installed: a named (server-side) cursor
+    # streams rows in batches; the default client-side cursor would fetch the
+    # whole result set before the first row is seen
     conn = psycopg2.connect(host=credentials['host'], port=credentials.get('port', 5432), database=credentials['dbname'], user=credentials['username'], password=credentials['password'])
     try:
-        sql = f"SELECT * FROM {schema}.{table_name}"
-        # use pandas read_sql in chunks
-        dfs = []
-        for chunk in pd.read_sql(sql, conn, chunksize=chunksize):
-            dfs.append(chunk)
-        if dfs:
-            df = pd.concat(dfs, ignore_index=True)
-        else:
-            df = pd.DataFrame()
-        return df
+        with conn.cursor(name='stream_extract') as cur:
+            cur.itersize = chunksize
+            cur.execute(sql)
+            # a named cursor leaves description as None until the first fetch,
+            # so pull the first batch before reading the column names
+            rows = cur.fetchmany(chunksize)
+            columns = [d[0] for d in cur.description]
+            batches = []
+            while rows:
+                batches.append(pa.Table.from_pylist([dict(zip(columns, row)) for row in rows]))
+                rows = cur.fetchmany(chunksize)
+        if not batches:
+            return pa.table({c: [] for c in columns})
+        return pa.concat_tables(batches, promote_options='default')
     finally:
         conn.close()
 
@@ -244,23 +330,19 @@ def extract_google_sheet_to_df(sheet_id: str, range_name: str, service_account_j
 
 # Parquet writer with metadata & atomic write
 
-def write_parquet_to_s3_atomic(df: pd.DataFrame, s3_output_path: str, partition_cols: List[str] = None, metadata: Dict = None):
-    """Write dataframe to S3 as Parquet atomically.
+def write_parquet_to_s3_atomic(table: pa.Table, s3_output_path: str, partition_cols: List[str] = None, metadata: Dict = None):
+    """Write an Arrow table to S3 as Parquet atomically.
     s3_output_path example: s3://bucket/raw/customers/date=2025-11-26/customers_20251126_1234.parquet
     """
-    ensure_local_tmp()
-    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.parquet', dir=LOCAL_TMP)
-    tmp_file.close()
-
-    table = pa.Table.from_pandas(df)
-    pq.write_table(table, tmp_file.name, compression='snappy')
-
-    # upload
     bucket_key = s3_output_path.replace('s3://', '')
     bucket, key = bucket_key.split('/', 1)
 
-    # atomic via upload then move (S3 has eventual consistency for overwrite; we write unique key)
-    s3_client.upload_file(tmp_file.name, bucket, key)
+    # stream the parquet straight to S3 — no local spill file to write, re-read,
+    # upload, and clean up (atomicity still comes from writing a unique key)
+    with arrow_fs.open_output_stream(bucket_key) as out:
+        pq.write_table(table, out, compression='snappy', row_group_size=1_000_000,
+                       data_page_size=2 << 20, write_batch_size=64_000,
+                       use_dictionary=True)
     logger.info('Uploaded parquet to s3://%s/%s', bucket, key)
 
     # write metadata sidecar
@@ -271,79 +353,122 @@ def write_parquet_to_s3_atomic(df: pd.DataFrame, s3_output_path: str, partition_
     s3_client.put_object(Body=metadata_payload.encode('utf-8'), Bucket=bucket, Key=metadata_key)
     logger.info('Wrote metadata sidecar s3://%s/%s', bucket, metadata_key)
 
-    os.remove(tmp_file.name)
     return f"s3://{bucket}/{key}"
 
 
 # Ingestion flows for each source
 
+def _ingest_one(obj: Dict, source_name: str) -> Tuple[str, pa.Table, Dict]:
+    """Download and normalize one S3 object. Returns (source_path, table, metadata), table/metadata None on failure."""
+    s3_path = f"s3://{obj['Bucket']}/{obj['Key']}"
+    try:
+        table = download_s3_to_table(s3_path)
+        if table.num_rows == 0:
+            logger.warning('Empty table for %s, skipping', s3_path)
+            return s3_path, None, None
+
+        # normalize columns
+        table = normalize_table_columns(table)
+
+        # basic cleaning heuristics
+        table = clean_email_table(table)
+
+        # add load metadata columns (date doubles as the hive partition key);
+        # one clock read so load_time and the partition date can never disagree
+        # across a midnight boundary
+        now = datetime.datetime.utcnow()
+        load_time = now.isoformat()
+        date_part = now.strftime('%Y-%m-%d')
+        table = table.append_column('_ingest_load_time', pa.array([load_time] * table.num_rows, pa.string()))
+        table = table.append_column('_source_path', pa.array([s3_path] * table.num_rows, pa.string()))
+        table = table.append_column('date', pa.array([date_part] * table.num_rows, pa.string()))
+
+        metadata = {
+            'source': source_name,
+            'source_path': s3_path,
+            'load_time_utc': load_time,
+            'record_count': int(table.num_rows),
+            'schema_hash': hash_table_schema(table)
+        }
+
+        return s3_path, table, metadata
+    except Exception:
+        logger.exception('Failed to process %s', s3_path)
+        return s3_path, None, None
+
+
 def process_s3_prefix(prefix_s3: str, source_name: str, file_ext_filter: List[str] = None):
-    """Process all objects under prefix, load to DF, normalize, and write Parquet to raw bucket."""
+    """Process all objects under prefix, load, normalize, and write Parquet to raw bucket.
+
+    Files are ingested concurrently: each worker is dominated by S3 round-trips
+    and GIL-free Arrow parsing, so threads give near-linear speedup on prefixes
+    with many small files.
+    """
     logger.info('Processing prefix %s', prefix_s3)
     objects = list_s3_objects(prefix_s3)
-    processed = read_processed_manifest()
-    new_processed = False
 
+    candidates = []
     for obj in objects:
-        s3_path = f"s3://{obj['Bucket']}/{obj['Key']}"
         if file_ext_filter:
             ext = obj['Key'].split('.')[-1].lower()
             if ext not in file_ext_filter:
                 continue
+        candidates.append(obj)
+
+    processed = read_processed_paths([f"s3://{obj['Bucket']}/{obj['Key']}" for obj in candidates])
 
+    to_ingest = []
+    for obj in candidates:
+        s3_path = f"s3://{obj['Bucket']}/{obj['Key']}"
         if s3_path in processed:
             logger.info('Skipping already processed file %s', s3_path)
             continue
+        to_ingest.append(obj)
 
-        try:
-            df = download_s3_to_dataframe(s3_path)
-            if df.empty:
-                logger.warning('Empty dataframe for %s, skipping', s3_path)
-                continue
-
-            # normalize columns
-            df = normalize_columns(df)
-
-            # basic cleaning heuristics
-            if 'email' in df.columns:
-                df['email_raw'] = df['email']
-                df['email'] = df['email'].apply(clean_email)
-
-            # add load metadata columns
-            load_time = datetime.datetime.utcnow().isoformat()
-            df['_ingest_load_time'] = load_time
-            df['_source_path'] = s3_path
-
-            # construct output path (partition by date)
-            date_part = datetime.datetime.utcnow().strftime('%Y-%m-%d')
-            filename = os.path.basename(obj['Key']).split('.')[0]
-            out_key = f"{S3_RAW_PREFIX}/{source_name}/date={date_part}/{filename}_{datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')}.parquet"
-            s3_out = f"s3://{S3_RAW_BUCKET}/{out_key}"
-
-            metadata = {
-                'source': source_name,
-                'source_path': s3_path,
-                'load_time_utc': load_time,
-                'record_count': int(len(df)),
-                'schema_hash': hash_df_schema(df)
-            }
-
-            write_parquet_to_s3_atomic(df, s3_out, metadata=metadata)
+    if not to_ingest:
+        return
 
-            # mark processed
-            processed[s3_path] = metadata
-            new_processed = True
-        except Exception:
-            logger.exception('Failed to process %s', s3_path)
+    tables = []
+    batch_metadata = []
+    max_workers = int(os.environ.get('INGEST_WORKERS', '16'))
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        # manifest updates stay on the main thread
+        for s3_path, table, metadata in ex.map(lambda o: _ingest_one(o, source_name), to_ingest):
+            if metadata:
+                tables.append(table)
+                batch_metadata.append(metadata)
+
+    if not tables:
+        return
 
-    if new_processed:
-        write_processed_manifest(processed)
+    # one dataset write for the whole batch: large row groups and one PUT per
+    # ~max_rows_per_file instead of a tiny parquet + sidecar per source file
+    combined = pa.concat_tables(tables, promote_options='default')
+    ts = datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    pads.write_dataset(
+        combined,
+        base_dir=f"{S3_RAW_BUCKET}/{S3_RAW_PREFIX}/{source_name}",
+        format='parquet',
+        partitioning=pads.partitioning(pa.schema([('date', pa.string())]), flavor='hive'),
+        filesystem=arrow_fs,
+        max_rows_per_file=2_000_000,
+        min_rows_per_group=128_000,
+        basename_template=f"{source_name}_{ts}_{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+    )
+    logger.info('Wrote %d rows from %d files for source %s', combined.num_rows, len(tables), source_name)
+
+    # consolidated manifest for the batch instead of per-file metadata sidecars
+    manifest_path = f"{S3_RAW_BUCKET}/{S3_RAW_PREFIX}/{source_name}/_manifest/manifest_{ts}.parquet"
+    with arrow_fs.open_output_stream(manifest_path) as out:
+        pq.write_table(pa.Table.from_pylist(batch_metadata), out)
+
+    append_processed_manifest(batch_metadata)
 
 
 def process_google_sheet(sheet_id: str, range_name: str, source_name: str, sa_path: str):
-    processed = read_processed_manifest()
     identifier = f"google_sheets://{sheet_id}/{range_name}"
-    if identifier in processed:
+    if identifier in read_processed_paths([identifier]):
         logger.info('Skipping already processed google sheet %s', identifier)
         return
 
@@ -355,14 +480,15 @@ def process_google_sheet(sheet_id: str, range_name: str, source_name: str, sa_pa
     df = normalize_columns(df)
     if 'email' in df.columns:
         df['email_raw'] = df['email']
-        df['email'] = df['email'].apply(clean_email)
+        df['email'] = clean_email_series(df['email_raw'])
 
-    load_time = datetime.datetime.utcnow().isoformat()
+    now = datetime.datetime.utcnow()
+    load_time = now.isoformat()
     df['_ingest_load_time'] = load_time
     df['_source_path'] = identifier
 
-    date_part = datetime.datetime.utcnow().strftime('%Y-%m-%d')
-    out_key = f"{S3_RAW_PREFIX}/{source_name}/date={date_part}/agents_{datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')}.parquet"
+    date_part = now.strftime('%Y-%m-%d')
+    out_key = f"{S3_RAW_PREFIX}/{source_name}/date={date_part}/agents_{now.strftime('%Y%m%d%H%M%S')}.parquet"
     s3_out = f"s3://{S3_RAW_BUCKET}/{out_key}"
 
     metadata = {
@@ -373,54 +499,53 @@ def process_google_sheet(sheet_id: str, range_name: str, source_name: str, sa_pa
         'schema_hash': hash_df_schema(df)
     }
 
-    write_parquet_to_s3_atomic(df, s3_out, metadata=metadata)
-    processed[identifier] = metadata
-    write_processed_manifest(processed)
+    write_parquet_to_s3_atomic(pa.Table.from_pandas(df, preserve_index=False), s3_out, metadata=metadata)
+    append_processed_manifest([metadata])
 
 
 def process_postgres_tables(table_names: List[str], ssm_param: str, source_name: str):
-    processed = read_processed_manifest()
     creds = get_ssm_param_json(ssm_param)
+    identifiers = [f"postgres://{creds['host']}/{creds['dbname']}/{t}" for t in table_names]
+    processed = read_processed_paths(identifiers)
+    new_rows = []
 
-    for table in table_names:
-        identifier = f"postgres://{creds['host']}/{creds['dbname']}/{table}"
+    for table_name, identifier in zip(table_names, identifiers):
         if identifier in processed:
             logger.info('Skipping already processed table %s', identifier)
             continue
 
         try:
-            df = extract_postgres_table_to_df(table, creds)
-            if df.empty:
-                logger.warning('Empty table %s, skipping', table)
+            table = extract_postgres_table_to_arrow(table_name, creds)
+            if table.num_rows == 0:
+                logger.warning('Empty table %s, skipping', table_name)
                 continue
 
-            df = normalize_columns(df)
-            if 'email' in df.columns:
-                df['email_raw'] = df['email']
-                df['email'] = df['email'].apply(clean_email)
+            table = normalize_table_columns(table)
+            table = clean_email_table(table)
 
-            load_time = datetime.datetime.utcnow().isoformat()
-            df['_ingest_load_time'] = load_time
-            df['_source_path'] = identifier
+            now = datetime.datetime.utcnow()
+            load_time = now.isoformat()
+            table = table.append_column('_ingest_load_time', pa.array([load_time] * table.num_rows, pa.string()))
+            table = table.append_column('_source_path', pa.array([identifier] * table.num_rows, pa.string()))
 
-            date_part = datetime.datetime.utcnow().strftime('%Y-%m-%d')
-            out_key = f"{S3_RAW_PREFIX}/{source_name}/date={date_part}/{table}_{datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')}.parquet"
+            date_part = now.strftime('%Y-%m-%d')
+            out_key = f"{S3_RAW_PREFIX}/{source_name}/date={date_part}/{table_name}_{now.strftime('%Y%m%d%H%M%S')}.parquet"
             s3_out = f"s3://{S3_RAW_BUCKET}/{out_key}"
 
             metadata = {
                 'source': source_name,
                 'source_path': identifier,
                 'load_time_utc': load_time,
-                'record_count': int(len(df)),
-                'schema_hash': hash_df_schema(df)
+                'record_count': int(table.num_rows),
+                'schema_hash': hash_table_schema(table)
             }
 
-            write_parquet_to_s3_atomic(df, s3_out, metadata=metadata)
-            processed[identifier] = metadata
+            write_parquet_to_s3_atomic(table, s3_out, metadata=metadata)
+            new_rows.append(metadata)
         except Exception:
-            logger.exception('Failed to extract table %s', table)
+            logger.exception('Failed to extract table %s', table_name)
 
-    write_processed_manifest(processed)
+    append_processed_manifest(new_rows)
 
 
 # Main pipeline entry
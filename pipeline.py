@@ -1,5 +1,6 @@
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from data_loader.load import remove_files
 from data_loader.load import init_supabase
 from data_loader.load import dataframe_to_supabase
@@ -7,7 +8,7 @@ from data_loader.load import upload_parquet_files
 from typing import Dict, List
 
 from dotenv import load_dotenv
-from extraction.extract import get_ssm_parameter
+from extraction.extract import get_db_credentials
 from extraction.extract import ensure_tmp_folder
 from extraction.extract import download_customer_csvs
 from extraction.extract import extract_postgres_table
@@ -25,9 +26,13 @@ ACCESS_KEY_ID = os.getenv("ACCESS_KEY_ID")
 # SETTINGS
 AWS_REGION = "eu-north-1"   # Stockholm Region
 LOCAL_TMP = "./tmp"
+# raw extracts live in a subfolder so the *.parquet upload sweep of ./tmp
+# only picks up the transformed outputs
+EXTRACTS_TMP = os.path.join(LOCAL_TMP, "extracts")
 
 # check and create folder
 ensure_tmp_folder()
+os.makedirs(EXTRACTS_TMP, exist_ok=True)
 
 # EXTRACT
 
@@ -42,28 +47,20 @@ POSTGRES_SSM_PARAMETER = "/coretelecomms/database/"  # JSON stored here
 CALL_LOGS_PREFIX = "s3://core-telecoms-data-lake/call logs/"  # contains daily CSV
 SOCIAL_MEDIA_PREFIX = "s3://core-telecoms-data-lake/social_medias/"
 
-# get parameters from parameter store
-db_host = get_ssm_parameter("/coretelecomms/database/db_host")
-db_name = get_ssm_parameter("/coretelecomms/database/db_name")
-db_user = get_ssm_parameter("/coretelecomms/database/db_username")
-db_pass = get_ssm_parameter("/coretelecomms/database/db_password")
-db_port = get_ssm_parameter("/coretelecomms/database/db_port")
-
-
-# Fetch database credentials from SSM
-db_credentials = {
-    "host": get_ssm_parameter("/coretelecomms/database/db_host"),
-    "database": get_ssm_parameter("/coretelecomms/database/db_name"),
-    "user": get_ssm_parameter("/coretelecomms/database/db_username"),
-    "password": get_ssm_parameter("/coretelecomms/database/db_password"),
-    "port": get_ssm_parameter("/coretelecomms/database/db_port"),
-}
+# Fetch all database credentials from SSM in a single call
+db_credentials = get_db_credentials(POSTGRES_SSM_PARAMETER)
 
 
 # Extract Website Complaints (Daily, from Postgres)
-for table in POSTGRES_TABLES:
+# the daily tables are independent, so extract them concurrently over the
+# shared connection pool: wall time ≈ the slowest table, not the sum
+def extract_table_to_tmp(table):
     df = extract_postgres_table(table, db_credentials)
-    df.to_csv(os.path.join(LOCAL_TMP, f"{table}.csv"), index=False)
+    # parquet intermediate: no text encode/parse round-trip and dtypes survive
+    df.to_parquet(os.path.join(EXTRACTS_TMP, f"{table}.parquet"), compression="snappy", index=False)
+
+with ThreadPoolExecutor(max_workers=4) as executor:
+    list(executor.map(extract_table_to_tmp, POSTGRES_TABLES))
 
 logging.info("All extractions completed successfully!")
  
@@ -79,7 +76,7 @@ call_logs = download_s3_prefix(CALL_LOGS_PREFIX, LOCAL_TMP, file_type="csv")
 # transform media complain data
 media_complains = transform_media_complaint_jsons()
 # transform web form data
-web_form = transform_web_form_csvs()
+web_form = transform_web_form_csvs(tmp_folder=EXTRACTS_TMP)
 # transform call logs data
 call_logs = transform_call_logs_csv()
 # transform customer data
@@ -1,201 +1,290 @@
+import hashlib
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, List
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.json as pajson
+import pyarrow.parquet as pq
 
+try:
+    # optional fast path: multithreaded Rust readers with Arrow-backed columns
+    import polars as pl
+except ImportError:
+    pl = None
 
-# SETTINGS
-
-LOCAL_TMP = "./tmp"
 
+# Copy-on-Write: column assignments and slices in the transform loop share
+# blocks until written instead of defensively copying whole frames
+pd.set_option("mode.copy_on_write", True)
 
-TMP_FOLDER = LOCAL_TMP
-
-def transform_call_logs_csv(tmp_folder: str = TMP_FOLDER):
-    """
-    Reads all CSV files starting with 'call_logs' from tmp folder, 
-    performs required transformations and returns ONE combined DataFrame.
-    """
 
-    csv_files = [
-        f for f in os.listdir(tmp_folder)
-        if f.startswith("call_logs") and f.endswith(".csv")
-    ]
-
-    if not csv_files:
-        print("No call_logs CSV files found.")
-        return pd.DataFrame()
+# SETTINGS
 
-    df_list = []
+LOCAL_TMP = "./tmp"
 
-    for file in csv_files:
-        file_path = os.path.join(tmp_folder, file)
 
-        # Load CSV
-        df = pd.read_csv(file_path)
+TMP_FOLDER = LOCAL_TMP
 
-        # Fix broken column name 
-        # Handles cases like "COMPLAINT_catego ry" with space in between
-        bad_cols = ["COMPLAINT_catego ry", "COMPLAINT_catego  ry", "COMPLAINT_category "]
-        for bad_col in bad_cols:
-            if bad_col in df.columns:
-                df = df.rename(columns={bad_col: "complaint_category"})
 
-        #  Generic column name cleaning 
-        df.columns = (
-            df.columns
-            .str.strip()
-            .str.lower()
-            .str.replace(" ", "_")
+# compiled once at import: _clean_name runs per column per file, and
+# re-compiling (or chaining str.replace calls) there adds up across runs
+_WS_RE = re.compile(r"\s+")
+
+
+# the broken-header spellings the source files are known to ship, as a
+# frozenset for O(1) membership before any string work happens
+_BAD_COLS = frozenset({
+    "COMPLAINT_catego ry",
+    "COMPLAINT_catego  ry",
+    "COMPLAINT_category ",
+})
+
+
+def _clean_name(col: str) -> str:
+    if col in _BAD_COLS:
+        return "complaint_category"
+    col = _WS_RE.sub("_", col.strip().lower())
+    # normalize-based fallback catches any broken variant not seen before
+    if col.replace("_", "") == "complaintcategory":
+        return "complaint_category"
+    return col
+
+
+# above this size the eager reader's whole-file working set starts to hurt,
+# so switch to the incremental reader (polars' streaming engine already
+# bounds memory on its own)
+_STREAM_THRESHOLD = 256 << 20  # 256 MB
+
+
+def _read_csv_arrow(file_path):
+    # timestamp_parsers lets Arrow type date columns during the parse pass,
+    # instead of a post-hoc pd.to_datetime falling back to slow dateutil
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=8 << 20)
+    convert_options = pacsv.ConvertOptions(
+        timestamp_parsers=["%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%m/%d/%Y"]
+    )
+
+    # memory-map the file: the parser reads straight from the page cache
+    # with no read() copies into userspace buffers
+    source = pa.memory_map(file_path, "r")
+
+    if os.path.getsize(file_path) > _STREAM_THRESHOLD:
+        # open_csv parses one block at a time, so peak memory stays near the
+        # final table size rather than table + parse buffers for every block
+        with pacsv.open_csv(
+            source,
+            read_options=read_options,
+            convert_options=convert_options
+        ) as reader:
+            return reader.read_all()
+
+    return pacsv.read_csv(
+        source,
+        read_options=read_options,
+        convert_options=convert_options
+    )
+
+
+def _read_json_arrow(file_path):
+    # Arrow's reader wants newline-delimited JSON; the media files sometimes
+    # arrive as plain JSON arrays, so fall back to orjson + from_pylist
+    try:
+        return pajson.read_json(
+            pa.memory_map(file_path, "r"),
+            read_options=pajson.ReadOptions(use_threads=True, block_size=8 << 20)
         )
-
-        #  Convert date-like columns to datetime 
-        for col in df.columns:
-            if "date" in col:
-                df[col] = pd.to_datetime(df[col], errors="coerce")
-
-        df_list.append(df)
-
-    # Combine all transformed dfs into one
-    final_df = pd.concat(df_list, ignore_index=True)
-
-    return final_df
-
-def transform_web_form_csvs(tmp_folder: str = TMP_FOLDER):
+    except pa.ArrowInvalid:
+        with open(file_path, "rb") as f:
+            records = orjson.loads(f.read())
+        table = pa.Table.from_pylist(records)
+        # match read_json's inference, which types ISO date strings as
+        # timestamp[s] — otherwise a folder mixing both formats fails the
+        # later concat on timestamp-vs-string schemas
+        for i, field in enumerate(table.schema):
+            if pa.types.is_string(field.type):
+                try:
+                    table = table.set_column(
+                        i, field.name, table.column(i).cast(pa.timestamp("s"))
+                    )
+                except pa.ArrowInvalid:
+                    pass
+        return table
+
+
+CACHE_FOLDER = os.path.join(LOCAL_TMP, ".cache")
+
+
+def _read_cached(file_path, reader):
+    """Wraps a reader with a local parquet cache so a source file is only
+    parsed once per (path, mtime, size); reruns hit pq.read_table instead.
     """
-    Reads all CSV files starting with 'web_form' from the tmp folder,
-    transforms column names (lowercase, underscores, no spaces),
-    converts date columns to datetime format,
-    and returns ONE combined DataFrame.
-    """
-
-    csv_files = [
-        f for f in os.listdir(tmp_folder)
-        if f.startswith("Web_form") and f.endswith(".csv")
-    ]
+    st = os.stat(file_path)
+    digest = hashlib.blake2b(file_path.encode()).hexdigest()[:16]
+    cache_path = os.path.join(
+        CACHE_FOLDER, f"{digest}_{st.st_mtime_ns}_{st.st_size}.parquet"
+    )
 
-    if not csv_files:
-        print("No web_form CSV files found.")
-        return pd.DataFrame()
+    if os.path.exists(cache_path):
+        return pq.read_table(cache_path)
 
-    df_list = []
+    table = reader(file_path)
+    os.makedirs(CACHE_FOLDER, exist_ok=True)
 
-    for file in csv_files:
-        file_path = os.path.join(tmp_folder, file)
+    # re-downloaded sources get fresh mtimes every run, so evict this path's
+    # older entries (same digest prefix) or the cache grows without bound
+    with os.scandir(CACHE_FOLDER) as it:
+        for entry in it:
+            if entry.name.startswith(f"{digest}_") and entry.is_file():
+                os.remove(entry.path)
 
-        # Load CSV
-        df = pd.read_csv(file_path)
+    pq.write_table(table, cache_path, compression="zstd", use_dictionary=True)
+    return table
 
-        #  Transform Column Names 
-        df.columns = (
-            df.columns
-            .str.lower()
-            .str.strip()
-            .str.replace(" ", "_")
-        )
 
-        #  Convert Date Columns 
-        for col in df.columns:
-            if "date" in col:
-                df[col] = pd.to_datetime(df[col], errors="coerce")
+def _iter_files(folder, prefix, suffix):
+    """Lists matching files with one syscall per entry via os.scandir.
 
-        df_list.append(df)
+    Returns full paths, biggest files first so downstream thread pools get
+    balanced work.
+    """
+    with os.scandir(folder) as it:
+        entries = [
+            e for e in it
+            if e.is_file() and e.name.startswith(prefix) and e.name.endswith(suffix)
+        ]
+    entries.sort(key=lambda e: -e.stat().st_size)
+    return [e.path for e in entries]
+
+
+def _optimize_dtypes(final_df):
+    """Shrinks the combined frame: low-cardinality strings become categories
+    and numerics are downcast to the narrowest type that fits."""
+    if final_df.empty:
+        return final_df
+    n = len(final_df)
+    for col in final_df.select_dtypes(include="object").columns:
+        # nested media-complaint JSON leaves dicts/lists in object columns,
+        # which nunique cannot hash — leave those as-is
+        try:
+            low_cardinality = final_df[col].nunique() / n < 0.5
+        except TypeError:
+            continue
+        if low_cardinality:
+            final_df[col] = final_df[col].astype("category")
+    for col in final_df.select_dtypes(include="integer").columns:
+        final_df[col] = pd.to_numeric(final_df[col], downcast="integer")
+    for col in final_df.select_dtypes(include="float").columns:
+        final_df[col] = pd.to_numeric(final_df[col], downcast="float")
+    return final_df
 
-    # Combine all transformed CSV files
-    final_df = pd.concat(df_list, ignore_index=True)
 
-    return final_df
+def _read_json_polars(file_path):
+    # mirror the Arrow reader: newline-delimited JSON is the primary format
+    # (read_json cannot parse it), array files fall back to read_json
+    try:
+        return pl.read_ndjson(file_path).lazy()
+    except pl.exceptions.ComputeError:
+        return pl.read_json(file_path).lazy()
 
 
-def transform_media_complaint_jsons(tmp_folder: str = TMP_FOLDER):
+def _transform_with_polars(lazy_frames):
     """
-    Reads all JSON files that start with 'media_complaint' from the tmp folder,
-    transforms column names (lowercase, replace spaces with underscore),
-    converts date columns to datetime, and returns ONE combined DataFrame.
+    Renames columns, combines, and collects a list of polars LazyFrames in one
+    streaming plan, returning a zero-copy Arrow-backed pandas DataFrame.
     """
-
-    json_files = [
-        f for f in os.listdir(tmp_folder)
-        if f.startswith("media_complaint") and f.endswith(".json")
-    ]
-
-    if not json_files:
-        print("No media_complaint JSON files found.")
-        return pd.DataFrame()  # return empty dataframe
-
-    df_list = []
-
-    for file in json_files:
-        file_path = os.path.join(tmp_folder, file)
-
-        # Load JSON
-        df = pd.read_json(file_path)
-
-        #  Transform Column Names 
-        df.columns = (
-            df.columns
-            .str.lower()
-            .str.strip()
-            .str.replace(" ", "_")
-        )
-
-        #  Convert All Date Columns to datetime 
-        for col in df.columns:
-            if "date" in col:
-                df[col] = pd.to_datetime(df[col], errors="coerce")
-
-        df_list.append(df)
-
-    # Combine all dataframes into one
-    final_df = pd.concat(df_list, ignore_index=True)
-
-    return final_df
-
-def transform_customers_csv(tmp_folder: str = TMP_FOLDER):
+    renamed = []
+    for lf in lazy_frames:
+        schema = lf.collect_schema()
+        lf = lf.rename({c: _clean_name(c) for c in schema.names()})
+        # same date contract as the Arrow path: string columns named like
+        # dates become datetime, with unparseable values nulled
+        date_casts = [
+            pl.col(_clean_name(c)).str.to_datetime(strict=False)
+            for c in schema.names()
+            if "date" in _clean_name(c) and schema[c] == pl.String
+        ]
+        if date_casts:
+            lf = lf.with_columns(date_casts)
+        renamed.append(lf)
+    final = pl.concat(renamed, how="diagonal_relaxed").collect(engine="streaming")
+    return final.to_pandas(use_pyarrow_extension_array=True)
+
+def _transform(prefix, suffix, reader, tmp_folder: str = TMP_FOLDER):
     """
-    Reads all CSV files starting with 'customer details' from tmp folder, 
-    performs required transformations and returns ONE combined DataFrame.
+    Reads all tmp files matching a prefix/suffix with the given Arrow reader,
+    cleans column names, converts date columns to datetime, and returns ONE
+    combined DataFrame. All four sources share this one pipeline.
     """
 
-    csv_files = [
-        f for f in os.listdir(tmp_folder)
-        if f.startswith("customers") and f.endswith(".csv")
-    ]
+    files = _iter_files(tmp_folder, prefix, suffix)
 
-    if not csv_files:
-        print("No call_logs CSV files found.")
+    if not files:
+        print(f"No {prefix}{suffix} files found.")
         return pd.DataFrame()
 
-    df_list = []
-
-    for file in csv_files:
-        file_path = os.path.join(tmp_folder, file)
-
-        # Load CSV
-        df = pd.read_csv(file_path)
-
-        # Fix broken column name 
-        # Handles cases like "COMPLAINT_catego ry" with space in between
-        bad_cols = ["COMPLAINT_catego ry", "COMPLAINT_catego  ry", "COMPLAINT_category "]
-        for bad_col in bad_cols:
-            if bad_col in df.columns:
-                df = df.rename(columns={bad_col: "complaint_category"})
-
-        #  Generic column name cleaning 
-        df.columns = (
-            df.columns
-            .str.strip()
-            .str.lower()
-            .str.replace(" ", "_")
-        )
+    if pl is not None:
+        # CSVs must stay one scan per file: a multi-file glob requires a
+        # single schema, but the sources ship differing broken-header
+        # spellings, so headers can only be cleaned per file before the
+        # diagonal concat. Parquet extracts share one Postgres schema, so
+        # those still go through a single glob plan.
+        if suffix == ".csv":
+            frames = [pl.scan_csv(f, try_parse_dates=True) for f in files]
+        elif suffix == ".parquet":
+            frames = [pl.scan_parquet(os.path.join(tmp_folder, f"{prefix}*.parquet"))]
+        else:
+            frames = [_read_json_polars(f) for f in files]
+        return _transform_with_polars(frames)
+
+    # parquet is already columnar, so the parse cache would only copy it
+    if suffix == ".parquet":
+        read_one = reader
+    else:
+        read_one = partial(_read_cached, reader=reader)
+
+    # Read all files concurrently — the Arrow readers release the GIL
+    with ThreadPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as executor:
+        tables = list(executor.map(read_one, files))
+
+    #  Transform column names while still on the Arrow side — a metadata-only
+    #  rename, no per-file pandas frame
+    tables = [
+        table.rename_columns([_clean_name(c) for c in table.column_names])
+        for table in tables
+    ]
 
-        # Convert date-like columns to datetime 
-        for col in df.columns:
-            if "date" in col:
-                df[col] = pd.to_datetime(df[col], errors="coerce")
+    # One Arrow concat across all files, then a single conversion at the
+    # pandas boundary; self_destruct frees the Arrow buffers as they are
+    # consumed and split_blocks keeps the result zero-copy where possible
+    combined = pa.concat_tables(tables, promote_options="default")
+    tables.clear()
+    df = combined.to_pandas(
+        self_destruct=True,
+        split_blocks=True,
+        date_as_object=False,
+        use_threads=True
+    )
+
+    #  Convert date-like columns to datetime in one multi-column pass;
+    #  columns Arrow already typed during the parse are skipped
+    date_cols = [
+        c for c in df.columns
+        if "date" in c and not pd.api.types.is_datetime64_any_dtype(df[c])
+    ]
+    if date_cols:
+        df[date_cols] = df[date_cols].apply(pd.to_datetime, errors="coerce")
 
-        df_list.append(df)
+    return _optimize_dtypes(df)
 
-    # Combine all transformed dfs into one
-    final_df = pd.concat(df_list, ignore_index=True)
 
-    return final_df
\ No newline at end of file
+# the public per-source entry points: same pipeline, different file pattern
+# and reader (web form parquet comes from the Postgres extraction step)
+transform_call_logs_csv = partial(_transform, "call_logs", ".csv", _read_csv_arrow)
+transform_customers_csv = partial(_transform, "customers", ".csv", _read_csv_arrow)
+transform_web_form_csvs = partial(_transform, "Web_form", ".parquet", pq.read_table)
+transform_media_complaint_jsons = partial(_transform, "media_complaint", ".json", _read_json_arrow)